@@ -2,19 +2,40 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from collections import Counter
 import seaborn as sns
+from sketches import CHUNKSIZE, new_counter, summary
 
-# 1. Chargement des données
-df = pd.read_csv("analyse_quali_enquete_specificite.csv", sep=";", encoding="latin1")
+# Mode approximatif : comptages à mémoire bornée (Space-Saving + Count-Min) pour les très gros panels
+APPROX = False
+
+GROUPES = ["Technique", "Organisationnel", "Humain", "Territorial", "Transversalité", "Pasdedifférence", "Vide"]
+
+def split_codes(col, fill):
+    return col.fillna(fill).str.replace(" ", "").str.split(",")
+
+# 1. Chargement des données par morceaux : chaque morceau a ses propres compteurs, fusionnés avec +
+hypotheses_count, groups_count, pairs_count = new_counter(APPROX), new_counter(APPROX), new_counter(APPROX)
+group_rows = Counter()  # §8 : lignes citant chaque groupe de GROUPES (liste fixe)
+total = 0
+for chunk in pd.read_csv("analyse_quali_enquete_specificite.csv", sep=";", encoding="latin1", chunksize=CHUNKSIZE):
+    hyps = split_codes(chunk['hypotheses'], '')
+    groups = split_codes(chunk['groupe'], 'Vide')
+    chunk_hyp, chunk_grp, chunk_pairs = new_counter(APPROX), new_counter(APPROX), new_counter(APPROX)
+    chunk_hyp.update(h or 'Vide' for sublist in hyps for h in sublist)
+    chunk_grp.update(g or 'Vide' for sublist in groups for g in sublist)
+    chunk_pairs.update((h or 'Vide', g or 'Vide') for hl, gl in zip(hyps, groups) for h in hl for g in gl)
+    hypotheses_count += chunk_hyp
+    groups_count += chunk_grp
+    pairs_count += chunk_pairs
+    for g in GROUPES:
+        group_rows[g] += chunk['groupe'].fillna('').str.contains(g).sum()
+    total += len(chunk)
 
 # 2. Comptage des hypothèses, y compris les réponses vides
-all_hypotheses = df['hypotheses'].fillna('').str.replace(" ", "").str.split(",")
-flat_hypotheses = [item if item else 'Vide' for sublist in all_hypotheses for item in sublist]
-hypotheses_count = Counter(flat_hypotheses)
-print("Nombre d'occurrences pour chaque hypothèse (y compris vides) :\n", hypotheses_count)
+print("Nombre d'occurrences pour chaque hypothèse (y compris vides) :\n", summary(hypotheses_count) if APPROX else hypotheses_count)
 
 # 3. Visualisation de la répartition des hypothèses
 plt.figure(figsize=(7,4))
-pd.Series(flat_hypotheses).value_counts().plot(kind="bar", color='cornflowerblue')
+pd.Series(dict(hypotheses_count.most_common())).plot(kind="bar", color='cornflowerblue')
 plt.title("Répartition des hypothèses dans les réponses (y compris vides)")
 plt.xlabel("Hypothèse")
 plt.ylabel("Nombre de réponses")
@@ -23,14 +44,11 @@ plt.show()
 
 # 4. Comptage des groupes
 # On inclut explicitement les valeurs manquantes dans la liste (utile si "Pas de différence")
-all_groups = df['groupe'].fillna('Vide').str.replace(" ", "").str.split(",")
-flat_groups = [item if item else 'Vide' for sublist in all_groups for item in sublist]
-groups_count = Counter(flat_groups)
-print("\nNombre d'occurrences pour chaque groupe (y compris vides) :\n", groups_count)
+print("\nNombre d'occurrences pour chaque groupe (y compris vides) :\n", summary(groups_count) if APPROX else groups_count)
 
 # 5. Visualisation de la répartition des groupes
 plt.figure(figsize=(8,4))
-pd.Series(flat_groups).value_counts().plot(kind="bar", color='darkseagreen')
+pd.Series(dict(groups_count.most_common())).plot(kind="bar", color='darkseagreen')
 plt.title("Occurrences des groupes dans les réponses (y compris vides)")
 plt.xlabel("Groupe thématique")
 plt.ylabel("Nombre de réponses")
@@ -38,16 +56,8 @@ plt.tight_layout()
 plt.show()
 
 # 6. Tableau croisé Hypothèses x Groupes (analyse de cooccurrence)
-df_exploded = df.assign(
-    hypotheses=df['hypotheses'].fillna('').str.replace(" ", "").str.split(","),
-    groupe=df['groupe'].fillna('Vide').str.replace(" ", "").str.split(",")
-).explode("hypotheses").explode("groupe")
-
-# On convertit les vides éventuels en chaîne "Vide" pour la clarté des tableaux/plots
-df_exploded['hypotheses'] = df_exploded['hypotheses'].replace('', 'Vide')
-df_exploded['groupe'] = df_exploded['groupe'].replace('', 'Vide')
-
-cross = pd.crosstab(df_exploded["hypotheses"], df_exploded["groupe"])
+# En mode approx., seules les sketches.TOP_K paires (hypothèse, groupe) les plus fréquentes sont conservées
+cross = pd.Series(dict(pairs_count.most_common())).unstack(fill_value=0).rename_axis(index="hypotheses", columns="groupe")
 print("\nTableau croisé hypothèses x groupes :\n", cross)
 
 # 7. Visualisation heatmap des cooccurrences (seulement si assez de données)
@@ -60,15 +70,14 @@ plt.tight_layout()
 plt.show()
 
 # 8. Pourcentage de réponses par groupe (toutes catégories)
-total = len(df)
 print("\nPourcentage de réponses où chaque groupe est cité (calcul multi-appartenance possible) :")
-for g in ["Technique", "Organisationnel", "Humain", "Territorial", "Transversalité", "Pasdedifférence", "Vide"]:
-    count = sum(df['groupe'].fillna('').str.contains(g))
-    print(f"{g}: {count/total:.2%}")
+for g in GROUPES:
+    print(f"{g}: {group_rows[g]/total:.2%}")
 
 # 9. Camembert pour le poids des non-réponses / “pas de différence”
-labels = pd.Series(flat_hypotheses).replace({'Vide':'Aucune hypothèse'}).value_counts().index
-sizes = pd.Series(flat_hypotheses).replace({'Vide':'Aucune hypothèse'}).value_counts().values
+hyp_share = pd.Series(dict(hypotheses_count.most_common())).rename({'Vide':'Aucune hypothèse'})
+labels = hyp_share.index
+sizes = hyp_share.values
 plt.figure(figsize=(6,6))
 plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=plt.cm.Pastel1.colors)
 plt.title("Part des hypothèses (dont réponses vides)")
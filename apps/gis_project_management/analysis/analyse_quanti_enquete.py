@@ -12,6 +12,10 @@ import prince
 from wordcloud import WordCloud
 from collections import Counter
 import re
+from sketches import CHUNKSIZE, new_counter, summary
+
+# Mode approximatif : comptages à mémoire bornée (Space-Saving + Count-Min) pour les très gros panels
+APPROX = False
 
 
 # --------------------- PALETTES & ORDRES ---------------------
@@ -194,16 +198,22 @@ for col in ['methode_nb', 'outil_proj_nb', 'docs_nb_formats', 'docs_note', 'meth
 # ----------- Analyse des causes ------------
 
 # 1. Nuages de mots des causes citées selon l'issue -- innovant 
-issue_texts = {issue: [] for issue in issue_palette}
-for idx, row in df[['influence','issue']].dropna().iterrows():
-    for cause in [e.strip() for e in re.split(',|;', str(row['influence']).lower()) if e.strip()]:
-        if row['issue'] in issue_texts:
-            issue_texts[row['issue']].append(cause)
+# Lecture par morceaux de la seule colonne texte : un compteur par issue et par morceau, fusionnés avec +
+issue_counts = {issue: new_counter(APPROX) for issue in issue_palette}
+for chunk in pd.read_csv("resultats_enquete_quanti.csv", encoding='utf-8', usecols=['influence', 'issue'], chunksize=CHUNKSIZE):
+    chunk['issue'] = chunk['issue'].fillna('Autre')
+    chunk_counts = {issue: new_counter(APPROX) for issue in issue_palette}
+    for influence, issue in chunk.dropna()[['influence', 'issue']].itertuples(index=False):
+        if issue in chunk_counts:
+            chunk_counts[issue].update(e.strip() for e in re.split(',|;', str(influence).lower()) if e.strip())
+    for issue in issue_palette:
+        issue_counts[issue] += chunk_counts[issue]
 fig, axes = plt.subplots(1, len(issue_palette), figsize=(5*len(issue_palette), 6))
 for i, (issue, color) in enumerate(issue_palette.items()):
     ax = axes[i] if len(issue_palette) > 1 else axes
-    counts = Counter(issue_texts[issue])
-    total = sum(counts.values())
+    counts = dict(issue_counts[issue].most_common())
+    # En mode approx. on divise par le total vu par le sketch, pas par la somme du top-k suivi
+    total = issue_counts[issue].n if APPROX else sum(counts.values())
     freqs = {k: v/total for k, v in counts.items()} if total > 0 else {}
     wc = WordCloud(width=600, height=600, background_color='white', color_func=lambda *args, **kwargs: color)
     wc.generate_from_frequencies(freqs)
@@ -216,10 +226,16 @@ plt.subplots_adjust(top=0.82)
 plt.show()
 
 # 2. Top causes toutes issues confondues
-causes = df['influence'].dropna().apply(lambda x: [c.strip() for c in re.split(',|;', x.lower()) if c.strip()])
-all_causes = [c for sublist in causes for c in sublist]
-cause_counts = Counter(all_causes)
-cause_df = pd.DataFrame.from_dict(cause_counts, orient='index', columns=['count']).sort_values('count', ascending=False)
+if APPROX:
+    # Les sketches par issue se fusionnent : pas de second passage sur les données
+    cause_counts = new_counter(APPROX)
+    for counts in issue_counts.values():
+        cause_counts = cause_counts + counts
+    print("Principales causes citées (approx.) :\n", summary(cause_counts))
+else:
+    causes = df['influence'].dropna().apply(lambda x: [c.strip() for c in re.split(',|;', x.lower()) if c.strip()])
+    cause_counts = Counter(c for sublist in causes for c in sublist)
+cause_df = pd.DataFrame(cause_counts.most_common(), columns=['cause', 'count']).set_index('cause')
 cause_df.head(10).plot(kind='bar', legend=False, color=issue_palette['Autre'])
 plt.title('Principales causes citées (toutes issues)')
 plt.xlabel('Cause')
@@ -228,14 +244,11 @@ plt.tight_layout()
 plt.show()
 
 # 3. Heatmap causes x issue (proportion)
-cause_issue = {}
-for idx, row in df[['influence','issue']].dropna().iterrows():
-    for c in [e.strip() for e in re.split(',|;', str(row['influence']).lower()) if e.strip()]:
-        if c not in cause_issue:
-            cause_issue[c] = Counter()
-        cause_issue[c][row['issue']] += 1
-cause_issue_df = pd.DataFrame(cause_issue).T.fillna(0)[issue_order]
-cause_issue_prop = cause_issue_df.div(cause_issue_df.sum(axis=0), axis=1) * 100
+cause_issue_df = pd.DataFrame({
+    issue: dict(issue_counts[issue].most_common()) for issue in issue_order
+}).fillna(0)
+issue_totals = pd.Series({issue: issue_counts[issue].n for issue in issue_order}) if APPROX else cause_issue_df.sum(axis=0)
+cause_issue_prop = cause_issue_df.div(issue_totals, axis=1) * 100
 plt.figure(figsize=(14,8))
 sns.heatmap(cause_issue_prop, annot=True, fmt=".1f", cmap='YlOrRd', cbar_kws={'label': 'Pourcentage (%)'}, linewidths=0.7)
 plt.title("Proportion des causes citées selon l'issue du projet")
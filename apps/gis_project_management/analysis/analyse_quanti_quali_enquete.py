@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
+from text_index import open_index
 
 # 1. Chargement des jeux de données
 df_quanti = pd.read_csv("resultats_enquete_quanti.csv", sep=",", encoding="utf-8")
@@ -126,11 +127,22 @@ plt.tight_layout()
 plt.show()
 
 # --------- EXEMPLE 8 : Citations illustratives pour chaque hypothèse ---------
+# Recherche BM25 dans l'index inversé des réponses ouvertes (text_index.py), parmi les conseils codés
+# avec l'hypothèse. La requête est formée des termes les plus caractéristiques de ces mêmes conseils
+# (TextIndex.top_terms, calculé sur la table postings) : aucun mot-clé n'est choisi à la main.
+index = open_index()
 for hyp in ['H1','H2','H3']:
-    print(f"\nExemple(s) de conseil pour l'hypothèse {hyp} :")
-    ex = df_conseil[df_conseil['hypotheses'].str.contains(hyp, na=False)].sample(2, random_state=1)
-    for _, row in ex.iterrows():
-        print(f"- {row['conseil']}")
+    query = " ".join(index.top_terms(field='conseil', hypothesis=hyp))
+    print(f"\nExemple(s) de conseil pour l'hypothèse {hyp} (termes : {query}) :")
+    hits = index.search(query, field='conseil', hypothesis=hyp, n=2)
+    quotes = [hit['text'] for hit in hits]
+    if len(quotes) < 2:
+        # Repli : tirage parmi les conseils codés avec l'hypothèse, comme auparavant (dédoublonné par id)
+        pool = df_conseil[df_conseil['hypotheses'].str.contains(hyp, na=False) & ~df_conseil['id'].isin([hit['id'] for hit in hits])]
+        quotes += pool.sample(min(2 - len(quotes), len(pool)), random_state=1)['conseil'].tolist()
+    for quote in quotes:
+        print(f"- {quote}")
+index.close()
 
 # --------- EXEMPLE 9 : Tableau croisé Hypothèse de conseil x Structure ---------
 cross_hyp_struct = pd.crosstab(
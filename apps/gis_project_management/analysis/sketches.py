@@ -0,0 +1,245 @@
+"""Comptages approximatifs à mémoire bornée (heavy hitters).
+
+Deux structures, toutes deux fusionnables entre morceaux (chunks) ou fichiers :
+
+- SpaceSaving(k) : garde au plus k compteurs. Tout élément de fréquence
+  > N/k est garanti présent, et chaque compte est surestimé d'au plus N/k
+  (borne exacte par élément donnée par `error(item)`).
+- CountMinSketch(width, depth) : tableau fixe depth x width. L'estimation
+  surestime d'au plus e/width * N avec une probabilité >= 1 - exp(-depth).
+
+Les deux exposent `update(iterable)` et `most_common(n)` comme un Counter,
+pour pouvoir les substituer dans les scripts d'analyse (voir `new_counter`).
+"""
+import hashlib
+import heapq
+import itertools
+import math
+from collections import Counter
+
+TOP_K = 50
+CHUNKSIZE = 10_000  # lignes lues par morceau (pd.read_csv(..., chunksize=CHUNKSIZE))
+
+
+class SpaceSaving:
+    """Top-k approximatif (algorithme Space-Saving, Metwally et al. 2005)."""
+
+    def __init__(self, k=50):
+        if k < 1:
+            raise ValueError("k doit être >= 1")
+        self.k = k
+        self.n = 0          # nombre total d'occurrences vues
+        self.counts = {}    # item -> compte (surestimé)
+        self.errors = {}    # item -> surestimation maximale
+        # Tas-min (compte, n° d'ordre, item), une entrée par item suivi. Les comptes n'y sont
+        # pas mis à jour à chaque incrément : une entrée périmée est corrigée quand elle
+        # remonte au sommet, ce qui garde le tas à k éléments et l'éviction en O(log k).
+        self._heap = []
+        self._seq = itertools.count()
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counts[item], next(self._seq), item))
+
+    def _min_entry(self):
+        while True:
+            c, _, item = self._heap[0]
+            if self.counts[item] == c:
+                return item
+            heapq.heapreplace(self._heap, (self.counts[item], next(self._seq), item))
+
+    def add(self, item, count=1):
+        self.n += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.k:
+            self.counts[item] = count
+            self.errors[item] = 0
+            self._push(item)
+        else:
+            # On remplace le plus petit compteur : le nouvel élément hérite de son compte
+            victim = self._min_entry()
+            heapq.heappop(self._heap)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+            self._push(item)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def min_count(self):
+        """Compte plancher : borne sup. de la fréquence de tout élément non suivi."""
+        if len(self.counts) < self.k:
+            return 0
+        return self.counts[self._min_entry()]
+
+    def __getitem__(self, item):
+        return self.counts.get(item, self.min_count())
+
+    def error(self, item):
+        """Surestimation maximale du compte de `item`."""
+        if item in self.errors:
+            return self.errors[item]
+        return self.min_count()
+
+    def error_bound(self):
+        """Borne globale de l'erreur : N/k."""
+        return self.n / self.k
+
+    def most_common(self, n=None):
+        items = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def guaranteed(self, n=None):
+        """Éléments du top dont le rang est certain : compte - erreur >= compte du suivant."""
+        top = self.most_common()
+        res = []
+        for i, (item, c) in enumerate(top[:n] if n else top):
+            nxt = top[i + 1][1] if i + 1 < len(top) else self.min_count()
+            if c - self.errors[item] < nxt:
+                break
+            res.append((item, c))
+        return res
+
+    def merge(self, other):
+        """Fusionne deux résumés (Agarwal et al. 2012) ; renvoie un nouveau SpaceSaving."""
+        k = max(self.k, other.k)
+        m1, m2 = self.min_count(), other.min_count()
+        out = SpaceSaving(k)
+        out.n = self.n + other.n
+        merged = {}
+        for item in set(self.counts) | set(other.counts):
+            c = self.counts.get(item, m1) + other.counts.get(item, m2)
+            e = self.errors.get(item, m1) + other.errors.get(item, m2)
+            merged[item] = (c, e)
+        for item, (c, e) in sorted(merged.items(), key=lambda kv: kv[1][0], reverse=True)[:k]:
+            out.counts[item] = c
+            out.errors[item] = e
+            out._push(item)
+        return out
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"SpaceSaving(k={self.k}, n={self.n}, top={self.most_common(10)})"
+
+
+class CountMinSketch:
+    """Sketch Count-Min : estimation de fréquence en mémoire fixe (Cormode & Muthukrishnan 2005)."""
+
+    def __init__(self, width=2048, depth=5):
+        self.width = width
+        self.depth = depth
+        self.n = 0
+        self.table = [[0] * width for _ in range(depth)]
+
+    @classmethod
+    def from_error(cls, epsilon=0.001, delta=0.01):
+        """Dimensionne le sketch pour une erreur <= epsilon*N avec probabilité 1-delta."""
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)))
+
+    def _indexes(self, item):
+        # Hash stable entre processus (hash() de Python est salé), requis pour fusionner.
+        # Un seul digest de 16 octets ; les lignes sont dérivées par double hachage h1 + i*h2.
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for row in range(self.depth):
+            yield row, (h1 + row * h2) % self.width
+
+    def add(self, item, count=1):
+        self.n += count
+        for row, col in self._indexes(item):
+            self.table[row][col] += count
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __getitem__(self, item):
+        return min(self.table[row][col] for row, col in self._indexes(item))
+
+    def error_bound(self):
+        """Surestimation maximale (e/width * N), valable avec probabilité 1 - exp(-depth)."""
+        return math.e / self.width * self.n
+
+    def confidence(self):
+        return 1 - math.exp(-self.depth)
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Dimensions de sketch incompatibles")
+        out = CountMinSketch(self.width, self.depth)
+        out.n = self.n + other.n
+        out.table = [[a + b for a, b in zip(r1, r2)] for r1, r2 in zip(self.table, other.table)]
+        return out
+
+    def __add__(self, other):
+        return self.merge(other)
+
+
+class HeavyHitters:
+    """Space-Saving pour les candidats + Count-Min pour resserrer leurs comptes."""
+
+    def __init__(self, k=50, width=2048, depth=5):
+        self.ss = SpaceSaving(k)
+        self.cms = CountMinSketch(width, depth)
+
+    @property
+    def n(self):
+        return self.ss.n
+
+    def add(self, item, count=1):
+        self.ss.add(item, count)
+        self.cms.add(item, count)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __getitem__(self, item):
+        return min(self.ss[item], self.cms[item])
+
+    def error(self, item):
+        """Surestimation maximale garantie, déduite de la borne Space-Saving.
+
+        La borne Count-Min (`cms.error_bound()`) n'est valable qu'avec probabilité
+        `cms.confidence()` ; elle n'est donc pas reprise ici.
+        """
+        return self[item] - (self.ss[item] - self.ss.error(item))
+
+    def most_common(self, n=None):
+        items = sorted(((item, self[item]) for item in self.ss.counts), key=lambda kv: kv[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def merge(self, other):
+        out = HeavyHitters.__new__(HeavyHitters)
+        out.ss = self.ss.merge(other.ss)
+        out.cms = self.cms.merge(other.cms)
+        return out
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def __repr__(self):
+        return f"HeavyHitters(n={self.n}, top={self.most_common(10)})"
+
+
+def new_counter(approx=False, k=TOP_K):
+    """Counter exact, ou HeavyHitters à mémoire bornée si `approx`. Les deux se fusionnent avec +."""
+    return HeavyHitters(k=k) if approx else Counter()
+
+
+def summary(sketch, n=10):
+    """Tableau texte du top-n : les sketches ne font que surestimer, d'où count-err <= vrai <= count."""
+    lines = [f"{'élément':<45} {'compte':>8} {'min garanti':>12} {'surestimation max':>18}"]
+    for item, c in sketch.most_common(n):
+        err = sketch.error(item)
+        lines.append(f"{str(item)[:45]:<45} {c:>8} {c - err:>12.0f} {err:>18.0f}")
+    return "\n".join(lines)
@@ -0,0 +1,271 @@
+"""Index inversé sur disque (SQLite) des réponses ouvertes, avec classement BM25.
+
+Chaque document est un couple (répondant, champ texte) de resultats_enquête_quali.csv.
+La tokenisation et les stopwords sont ceux des nuages de mots de l'application
+(STOPWORDS de config.js), pour que les recherches et les nuages restent cohérents.
+
+Usage :
+    idx = open_index()
+    for hit in idx.search("documentation", field="conseil", issue="Succès", hypothesis="H1"):
+        print(hit["score"], hit["text"])
+
+ou en ligne de commande :
+    python text_index.py documentation --field conseil --issue Succès --hypothesis H1
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "index_quali.sqlite")
+QUALI_CSV = os.path.join(HERE, "resultats_enquête_quali.csv")
+CONSEIL_CSV = os.path.join(HERE, "analyse_quali_enquete_conseil.csv")
+SPECIFICITE_CSV = os.path.join(HERE, "analyse_quali_enquete_specificite.csv")
+CONFIG_JS = os.path.join(HERE, "..", "config.js")
+
+TEXT_FIELDS = [
+    "conseil", "specificite_sig", "presentation",
+    "influence_orga_com", "influence_humaine_com", "influence_budget_com",
+    "influence_technique_com", "influence_politique_com", "influence_autre_com",
+]
+# Champ texte -> fichier où ses réponses sont codées en hypothèses.
+# Les autres champs ne sont pas codés : ils n'ont pas d'hypothèses et le filtre les exclut.
+HYPOTHESIS_SOURCES = {"conseil": CONSEIL_CSV, "specificite_sig": SPECIFICITE_CSV}
+
+# À incrémenter à chaque changement de schéma ou de tokenisation : force la reconstruction
+FORMAT_VERSION = 2
+
+# Paramètres BM25 usuels
+K1 = 1.2
+B = 0.75
+
+# Même nettoyage que renderWordClouds() dans app.js
+PUNCT = re.compile(r"[.,;:!?()\[\]\"']")
+
+
+def load_stopwords(path=CONFIG_JS):
+    """Lit la liste STOPWORDS curée dans config.js."""
+    with open(path, encoding="utf-8") as f:
+        js = f.read()
+    body = re.search(r"STOPWORDS\s*=\s*new Set\(\[(.*?)\]\)", js, re.S).group(1)
+    return {w.replace("\\'", "'") for w in re.findall(r"'((?:[^'\\]|\\.)*)'", body)}
+
+
+def tokenize(text, stopwords):
+    return [w for w in PUNCT.sub(" ", text.lower()).split() if w and w not in stopwords]
+
+
+def _sources(csv_path=QUALI_CSV):
+    """Fichiers dont dépend l'index, y compris ce module (champs, tokenisation, schéma)."""
+    return [csv_path, CONFIG_JS, os.path.abspath(__file__), *HYPOTHESIS_SOURCES.values()]
+
+
+def _hypotheses(path):
+    """id -> liste d'hypothèses (H1, H2...) d'un fichier de codage quali."""
+    with open(path, encoding="latin1", newline="") as f:
+        return {
+            row["id"].strip(): [h.strip() for h in (row["hypotheses"] or "").split(",") if h.strip()]
+            for row in csv.DictReader(f, delimiter=";")
+        }
+
+
+def build_index(db_path=DEFAULT_DB, csv_path=QUALI_CSV, stopwords=None):
+    """(Re)construit l'index à partir du CSV quali et des fichiers de codage."""
+    stopwords = load_stopwords() if stopwords is None else stopwords
+    hyp_by_field = {field: _hypotheses(path) for field, path in HYPOTHESIS_SOURCES.items()}
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    con = sqlite3.connect(db_path)
+    con.executescript("""
+        CREATE TABLE docs (
+            doc_id INTEGER PRIMARY KEY, id TEXT, field TEXT, text TEXT,
+            issue TEXT, structure TEXT, hypotheses TEXT, length INTEGER
+        );
+        CREATE TABLE doc_hypotheses (
+            hypothesis TEXT, doc_id INTEGER, PRIMARY KEY (hypothesis, doc_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE postings (
+            term TEXT, doc_id INTEGER, tf INTEGER, PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER) WITHOUT ROWID;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value REAL);
+    """)
+
+    df = Counter()
+    n_docs = total_len = 0
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            rid = row["id"].strip()
+            for field in TEXT_FIELDS:
+                text = (row.get(field) or "").strip()
+                if not text:
+                    continue
+                hyps = hyp_by_field[field].get(rid, []) if field in hyp_by_field else []
+                tokens = Counter(tokenize(text, stopwords))
+                length = sum(tokens.values())
+                cur = con.execute(
+                    "INSERT INTO docs (id, field, text, issue, structure, hypotheses, length) VALUES (?,?,?,?,?,?,?)",
+                    (rid, field, text, row["issue"], row["structure"], ",".join(hyps), length),
+                )
+                con.executemany(
+                    "INSERT OR IGNORE INTO doc_hypotheses VALUES (?,?)",
+                    [(h, cur.lastrowid) for h in hyps],
+                )
+                con.executemany(
+                    "INSERT INTO postings VALUES (?,?,?)",
+                    [(term, cur.lastrowid, tf) for term, tf in tokens.items()],
+                )
+                df.update(tokens.keys())
+                n_docs += 1
+                total_len += length
+
+    con.executemany("INSERT INTO terms VALUES (?,?)", df.items())
+    con.executemany("INSERT INTO meta VALUES (?,?)", [
+        ("n_docs", n_docs),
+        ("avgdl", total_len / n_docs if n_docs else 0),
+        ("source_mtime", max(os.path.getmtime(p) for p in _sources(csv_path))),
+        ("format_version", FORMAT_VERSION),
+    ])
+    con.execute("CREATE INDEX docs_field ON docs (field)")
+    con.commit()
+    con.close()
+    return db_path
+
+
+class TextIndex:
+    def __init__(self, db_path=DEFAULT_DB, stopwords=None):
+        self.con = sqlite3.connect(db_path)
+        self.con.row_factory = sqlite3.Row
+        self.stopwords = load_stopwords() if stopwords is None else stopwords
+        meta = dict(self.con.execute("SELECT key, value FROM meta").fetchall())
+        self.n_docs = meta["n_docs"]
+        self.avgdl = meta["avgdl"] or 1
+        self.source_mtime = meta["source_mtime"]
+
+    def _idf(self, df):
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    @staticmethod
+    def _filters(field=None, issue=None, structure=None, hypothesis=None):
+        """Clauses SQL (sur l'alias `d` de docs) et paramètres des filtres communs."""
+        sql, params = [], []
+        for col, value in (("field", field), ("issue", issue), ("structure", structure)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            sql.append(f"AND d.{col} IN ({','.join('?' * len(values))})")
+            params += values
+        if hypothesis:
+            sql.append("AND d.doc_id IN (SELECT doc_id FROM doc_hypotheses WHERE hypothesis = ?)")
+            params.append(hypothesis)
+        return sql, params
+
+    def search(self, query, field=None, issue=None, structure=None, hypothesis=None, n=5):
+        """Les n documents les mieux classés (BM25) pour `query`, après filtrage.
+
+        `field`, `issue` et `structure` acceptent une valeur ou une liste de valeurs ;
+        `hypothesis` filtre sur une hypothèse codée (ex. "H1") et ne renvoie donc
+        que des champs codés (conseil, specificite_sig).
+        """
+        terms = list(dict.fromkeys(tokenize(query, self.stopwords)))
+        if not terms:
+            return []
+        marks = ",".join("?" * len(terms))
+        idf = {
+            r["term"]: self._idf(r["df"])
+            for r in self.con.execute(f"SELECT term, df FROM terms WHERE term IN ({marks})", terms)
+        }
+        if not idf:
+            return []
+
+        sql = [f"SELECT p.term, p.tf, d.* FROM postings p JOIN docs d ON d.doc_id = p.doc_id WHERE p.term IN ({marks})"]
+        params = list(terms)
+        filter_sql, filter_params = self._filters(field, issue, structure, hypothesis)
+        sql += filter_sql
+        params += filter_params
+
+        scores, docs = Counter(), {}
+        for r in self.con.execute(" ".join(sql), params):
+            norm = K1 * (1 - B + B * r["length"] / self.avgdl)
+            scores[r["doc_id"]] += idf[r["term"]] * r["tf"] * (K1 + 1) / (r["tf"] + norm)
+            docs[r["doc_id"]] = r
+        return [
+            {
+                "score": round(score, 3),
+                "id": docs[doc_id]["id"],
+                "field": docs[doc_id]["field"],
+                "issue": docs[doc_id]["issue"],
+                "structure": docs[doc_id]["structure"],
+                "hypotheses": [h for h in docs[doc_id]["hypotheses"].split(",") if h],
+                "coded": docs[doc_id]["field"] in HYPOTHESIS_SOURCES,
+                "text": docs[doc_id]["text"],
+            }
+            for doc_id, score in scores.most_common(n)
+        ]
+
+    def top_terms(self, n=5, field=None, issue=None, structure=None, hypothesis=None, min_docs=2):
+        """Termes les plus caractéristiques des documents filtrés (somme des tf x idf).
+
+        Seuls les termes présents dans au moins `min_docs` de ces documents sont retenus,
+        pour ne pas remonter le vocabulaire propre à une seule réponse.
+        """
+        filter_sql, params = self._filters(field, issue, structure, hypothesis)
+        sql = " ".join([
+            "SELECT p.term, SUM(p.tf) AS tf, COUNT(*) AS n, t.df FROM postings p",
+            "JOIN docs d ON d.doc_id = p.doc_id JOIN terms t ON t.term = p.term WHERE 1",
+            *filter_sql,
+            "GROUP BY p.term HAVING n >= ?",
+        ])
+        scored = [(r["tf"] * self._idf(r["df"]), r["term"]) for r in self.con.execute(sql, params + [min_docs])]
+        return [term for _, term in sorted(scored, key=lambda st: (-st[0], st[1]))[:n]]
+
+    def close(self):
+        self.con.close()
+
+
+def _is_fresh(db_path):
+    if not os.path.exists(db_path):
+        return False
+    try:
+        con = sqlite3.connect(db_path)
+        try:
+            meta = dict(con.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return False
+    return (
+        meta.get("format_version") == FORMAT_VERSION
+        and meta.get("source_mtime", 0) >= max(os.path.getmtime(p) for p in _sources())
+    )
+
+
+def open_index(db_path=DEFAULT_DB, rebuild=False):
+    """Ouvre l'index, en le (re)construisant s'il manque, si son format a changé ou si les sources ont changé."""
+    if rebuild or not _is_fresh(db_path):
+        build_index(db_path)
+    return TextIndex(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recherche de citations dans les réponses ouvertes")
+    parser.add_argument("query")
+    parser.add_argument("--field", choices=TEXT_FIELDS)
+    parser.add_argument("--issue")
+    parser.add_argument("--structure")
+    parser.add_argument("--hypothesis")
+    parser.add_argument("-n", type=int, default=5)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    idx = open_index(rebuild=args.rebuild)
+    for hit in idx.search(args.query, args.field, args.issue, args.structure, args.hypothesis, args.n):
+        hyps = (", ".join(hit["hypotheses"]) or "-") if hit["coded"] else "non codé"
+        print(f"[{hit['score']}] #{hit['id']} {hit['field']} ({hit['issue']}, {hyps})")
+        print(f"    {hit['text']}")
+    idx.close()